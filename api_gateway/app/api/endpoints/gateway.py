@@ -0,0 +1,108 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import Response, StreamingResponse
+from starlette.background import BackgroundTask
+from app.core.services.backends import (
+    BackendPool, CachedResponse, ffmpeg_backend, ai_backend, response_cache, filter_headers
+)
+
+router = APIRouter()
+
+
+async def forward(backend: BackendPool, request: Request, path: str, invalidates: tuple = ()) -> StreamingResponse:
+    """
+    Проксирует запрос в бэкенд без буферизации: тело запроса и ответа передаются потоком.
+
+    :param invalidates: Префиксы ключей кэша, которые устаревают после этого запроса
+    """
+    response, url = await backend.send(
+        request.method,
+        path,
+        params=request.query_params,
+        headers=filter_headers(request.headers),
+        content=request.stream() if request.method in ("POST", "PUT", "PATCH") else None
+    )
+    # Сбрасываем кэш после записи в бэкенде: GET, пришедший во время записи, мог закэшировать старые данные
+    response_cache.invalidate(*invalidates)
+
+    async def body():
+        # Закрываем ответ в finally: при обрыве upstream или отключении клиента фоновая задача не запускается
+        try:
+            async for chunk in response.aiter_raw():
+                yield chunk
+        finally:
+            await backend.close(response, url)  # Соединение вернётся в пул, счётчик нагрузки уменьшится
+
+    return StreamingResponse(
+        body(),
+        status_code=response.status_code,
+        headers=filter_headers(response.headers),
+        background=BackgroundTask(response_cache.invalidate, *invalidates)
+    )
+
+
+async def cached_get(backend: BackendPool, request: Request, path: str) -> Response:
+    """
+    GET через TTL-кэш: одинаковые одновременные запросы объединяются в один запрос к бэкенду.
+    """
+    key = f"{backend.name}:{path}?{request.query_params}"
+
+    async def fetch() -> CachedResponse:
+        response = await backend.request("GET", path, params=request.query_params)
+        return CachedResponse(response.status_code, response.content, response.headers.get("content-type"))
+
+    cached = await response_cache.get_or_fetch(key, fetch)
+    return Response(content=cached.content, status_code=cached.status_code, media_type=cached.media_type)
+
+
+# 1️⃣ Загрузка видео (поток напрямую в backend FFmpeg)
+@router.post("/upload")
+async def upload(request: Request):
+    return await forward(ffmpeg_backend, request, "/videos/upload", invalidates=("ffmpeg:/videos/list",))
+
+# 2️⃣ Нарезка видео
+@router.post("/cut")
+async def cut(request: Request):
+    return await forward(ffmpeg_backend, request, "/editor/cut", invalidates=("ffmpeg:/videos/list",))
+
+# 3️⃣ Распознавание аудио (Whisper)
+@router.post("/transcribe")
+async def transcribe(request: Request):
+    return await forward(ai_backend, request, "/api/transcribe")
+
+# 4️⃣ Анализ тайм-кодов (GPT-4o)
+@router.post("/analyze")
+async def analyze(request: Request):
+    return await forward(ai_backend, request, "/api/nlp-segments")
+
+# 5️⃣ Статус обработки
+@router.get("/status/{video_id}")
+async def get_status(video_id: str, request: Request):
+    return await cached_get(ffmpeg_backend, request, f"/queue/status/{video_id}")
+
+# 6️⃣ Список видео (СТАТИЧЕСКИЙ РОУТ ДОЛЖЕН ИДТИ ПЕРВЫМ!)
+@router.get("/list")
+async def get_list(request: Request):
+    return await cached_get(ffmpeg_backend, request, "/videos/list")
+
+# Скачивание видео (поток без буферизации)
+@router.get("/download/{video_id}")
+async def download(video_id: str, request: Request):
+    return await forward(ffmpeg_backend, request, f"/videos/download/{video_id}")
+
+# 7️⃣ Получение ссылки на видео
+@router.get("/video/{video_id}")
+async def get_video(video_id: str, request: Request):
+    return await cached_get(ffmpeg_backend, request, f"/videos/video/{video_id}")
+
+# 8️⃣ Удаление видео
+@router.delete("/video/{video_id}")
+async def remove(video_id: str, request: Request):
+    return await forward(
+        ffmpeg_backend, request, f"/videos/video/{video_id}",
+        invalidates=("ffmpeg:/videos/list", f"ffmpeg:/videos/video/{video_id}?")
+    )
+
+# Нагрузка на инстансы бэкендов
+@router.get("/backends")
+async def get_backends():
+    return [ffmpeg_backend.stats(), ai_backend.stats()]
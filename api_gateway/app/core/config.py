@@ -0,0 +1,23 @@
+import os
+from dotenv import load_dotenv
+
+# Загружаем .env
+load_dotenv()
+
+# Конфигурация API Gateway
+class Settings:
+    # Инстансы бэкендов через запятую — нагрузка распределяется между ними
+    FFMPEG_BACKENDS = [url.strip() for url in os.getenv("FFMPEG_BACKENDS", "http://127.0.0.1:8228").split(",") if url.strip()]
+    AI_BACKENDS = [url.strip() for url in os.getenv("AI_BACKENDS", "http://127.0.0.1:8229").split(",") if url.strip()]
+
+    # Пул соединений к бэкендам
+    MAX_CONNECTIONS = int(os.getenv("GATEWAY_MAX_CONNECTIONS", "100"))
+    MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("GATEWAY_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    CONNECT_TIMEOUT = float(os.getenv("GATEWAY_CONNECT_TIMEOUT", "5"))
+    READ_TIMEOUT = float(os.getenv("GATEWAY_READ_TIMEOUT", "600"))  # FFmpeg-операции бывают долгими
+
+    # TTL-кэш для GET-запросов (секунды)
+    CACHE_TTL = float(os.getenv("GATEWAY_CACHE_TTL", "2"))
+    CACHE_MAX_ENTRIES = int(os.getenv("GATEWAY_CACHE_MAX_ENTRIES", "1024"))
+
+settings = Settings()
@@ -0,0 +1,153 @@
+import asyncio
+import itertools
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import httpx
+from fastapi import HTTPException
+from app.core.config import settings
+
+# Заголовки, которые нельзя проксировать как есть (hop-by-hop)
+HOP_BY_HOP_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailers", "transfer-encoding", "upgrade", "host",
+}
+
+
+def filter_headers(headers) -> dict:
+    """
+    Убирает hop-by-hop заголовки перед проксированием.
+    """
+    return {key: value for key, value in headers.items() if key.lower() not in HOP_BY_HOP_HEADERS}
+
+
+class BackendPool:
+    """
+    Группа инстансов одного бэкенда с общим пулом постоянных HTTP-соединений.
+    Каждый запрос уходит на инстанс с наименьшим числом активных запросов.
+    """
+
+    def __init__(self, name: str, urls: list):
+        self.name = name
+        self.urls = urls
+        self.in_flight = {url: 0 for url in urls}
+        self._counter = itertools.count()
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.MAX_CONNECTIONS,
+                max_keepalive_connections=settings.MAX_KEEPALIVE_CONNECTIONS,
+            ),
+            timeout=httpx.Timeout(settings.READ_TIMEOUT, connect=settings.CONNECT_TIMEOUT),
+        )
+
+    def acquire(self) -> str:
+        """
+        Выбирает наименее загруженный инстанс (при равенстве — по кругу).
+        """
+        start = next(self._counter) % len(self.urls)
+        candidates = self.urls[start:] + self.urls[:start]
+        url = min(candidates, key=self.in_flight.get)
+        self.in_flight[url] += 1
+        return url
+
+    def release(self, url: str) -> None:
+        self.in_flight[url] -= 1
+
+    async def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """
+        Выполняет запрос и читает ответ целиком (для небольших JSON-ответов).
+        """
+        url = self.acquire()
+        try:
+            return await self.client.request(method, f"{url}{path}", **kwargs)
+        except httpx.RequestError as e:
+            raise HTTPException(status_code=502, detail=f"❌ Бэкенд `{self.name}` недоступен: {str(e)}")
+        finally:
+            self.release(url)
+
+    async def send(self, method: str, path: str, **kwargs):
+        """
+        Выполняет запрос без чтения тела ответа (стриминг).
+        Вызывающий обязан закрыть ответ через `close(response, url)`.
+
+        :return: Кортеж (response, url)
+        """
+        url = self.acquire()
+        try:
+            request = self.client.build_request(method, f"{url}{path}", **kwargs)
+            return await self.client.send(request, stream=True), url
+        except httpx.RequestError as e:
+            self.release(url)
+            raise HTTPException(status_code=502, detail=f"❌ Бэкенд `{self.name}` недоступен: {str(e)}")
+
+    async def close(self, response: httpx.Response, url: str) -> None:
+        await response.aclose()
+        self.release(url)
+
+    def stats(self) -> dict:
+        return {"name": self.name, "in_flight": dict(self.in_flight)}
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+@dataclass
+class CachedResponse:
+    status_code: int
+    content: bytes
+    media_type: str
+
+
+class ResponseCache:
+    """
+    Небольшой TTL-кэш GET-ответов с объединением одинаковых одновременных запросов:
+    пока запрос к бэкенду выполняется, остальные ждут тот же результат.
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # key -> (expires_at, CachedResponse)
+        self.pending = {}  # key -> asyncio.Task
+
+    async def get_or_fetch(self, key: str, fetch) -> CachedResponse:
+        cached = self.entries.get(key)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+        task = self.pending.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fetch())
+            self.pending[key] = task
+            task.add_done_callback(lambda t: self._store(key, t))
+        # shield: отмена одного клиента не отменяет запрос для остальных
+        return await asyncio.shield(task)
+
+    def _store(self, key: str, task: asyncio.Task) -> None:
+        if self.pending.get(key) is not task:
+            return  # Запись сброшена, пока запрос выполнялся — результат может быть устаревшим
+        del self.pending[key]
+        if task.cancelled() or task.exception() is not None:
+            return
+        result = task.result()
+        if result.status_code >= 500 or self.ttl <= 0:
+            return  # Ошибки бэкенда не кэшируем
+        self.entries[key] = (time.monotonic() + self.ttl, result)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, *prefixes: str) -> None:
+        """
+        Сбрасывает записи, ключи которых начинаются с одного из префиксов.
+        """
+        for key in [key for key in self.entries if key.startswith(prefixes)]:
+            del self.entries[key]
+        for key in [key for key in self.pending if key.startswith(prefixes)]:
+            del self.pending[key]
+
+
+ffmpeg_backend = BackendPool("ffmpeg", settings.FFMPEG_BACKENDS)
+ai_backend = BackendPool("ai", settings.AI_BACKENDS)
+response_cache = ResponseCache(settings.CACHE_TTL, settings.CACHE_MAX_ENTRIES)
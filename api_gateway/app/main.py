@@ -0,0 +1,22 @@
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
+from app.api.endpoints import gateway
+from app.core.services.backends import ffmpeg_backend, ai_backend
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Закрываем пулы соединений к бэкендам
+    await ffmpeg_backend.aclose()
+    await ai_backend.aclose()
+
+app = FastAPI(title="API Gateway", lifespan=lifespan)
+
+# Подключаем эндпоинты
+app.include_router(gateway.router, prefix="/api")
+
+# Корневой эндпоинт
+@app.get("/")
+def root():
+    return {"message": "API Gateway работает!"}
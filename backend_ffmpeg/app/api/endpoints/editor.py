@@ -1,26 +1,40 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
 from typing import List
+from app.core.config import settings
+from app.core.services.jobs import enqueue_job
 from app.core.services.video_editor import cut_video, convert_video, resize_video, crop_video, merge_videos
 
 router = APIRouter()
 
+
+def enqueue_operation(operation: str, request: BaseModel) -> dict:
+    """
+    Ставит операцию в очередь для воркеров (режим `queue`): API только принимает задачу.
+    """
+    job = enqueue_job(operation, request.dict())
+    return {"job_id": job["id"], "status": job["status"]}
+
 # 📌 Модель запроса
 class CutRequest(BaseModel):
     video_id: str
     start_time: float
     end_time: float
     format: str = "mp4"
+    preview: bool = False  # Превью на прокси-версии
 
 # 📌 Эндпоинт нарезки видео
 @router.post("/cut")
 async def cut_video_endpoint(request: CutRequest):
+    if settings.EXECUTION_MODE == "queue":
+        return enqueue_operation("cut", request)
     try:
         video_url = cut_video(
             video_id=request.video_id,
             start_time=request.start_time,
             end_time=request.end_time,
-            format=request.format
+            format=request.format,
+            preview=request.preview
         )
         return {"url": video_url}
     except Exception as e:
@@ -31,14 +45,18 @@ async def cut_video_endpoint(request: CutRequest):
 class ConvertRequest(BaseModel):
     video_id: str
     target_format: str
+    preview: bool = False
 
 # 📌 Эндпоинт для конвертации видео
 @router.post("/convert")
 async def convert_video_endpoint(request: ConvertRequest):
+    if settings.EXECUTION_MODE == "queue":
+        return enqueue_operation("convert", request)
     try:
         video_url = convert_video(
             video_id=request.video_id,
-            target_format=request.target_format
+            target_format=request.target_format,
+            preview=request.preview
         )
         return {"url": video_url}
     except Exception as e:
@@ -49,15 +67,19 @@ class ResizeRequest(BaseModel):
     video_id: str
     resolution: str  # Например, "1280x720"
     format: str = "mp4"
+    preview: bool = False
 
 # 📌 Эндпоинт для изменения разрешения видео
 @router.post("/resize")
 async def resize_video_endpoint(request: ResizeRequest):
+    if settings.EXECUTION_MODE == "queue":
+        return enqueue_operation("resize", request)
     try:
         video_url = resize_video(
             video_id=request.video_id,
             resolution=request.resolution,
-            format=request.format
+            format=request.format,
+            preview=request.preview
         )
         return {"url": video_url}
     except Exception as e:
@@ -70,12 +92,15 @@ class CropRequest(BaseModel):
     width: int = Field(..., gt=0, example=1280)
     height: int = Field(..., gt=0, example=720)
     format: str = Field("mp4", example="mp4")
+    preview: bool = Field(False, example=False)
 
 @router.post("/crop")
 async def crop_video_endpoint(request: CropRequest):
     """
     Эндпоинт обрезки видео.
     """
+    if settings.EXECUTION_MODE == "queue":
+        return enqueue_operation("crop", request)
     try:
         video_url = crop_video(
             video_id=request.video_id,
@@ -83,7 +108,8 @@ async def crop_video_endpoint(request: CropRequest):
             y=request.y,
             width=request.width,
             height=request.height,
-            format=request.format
+            format=request.format,
+            preview=request.preview
         )
         return {"message": "✅ Видео успешно обрезано!", "url": video_url}
     except HTTPException as e:
@@ -97,20 +123,34 @@ class MergeRequest(BaseModel):
     main_video_id: str
     background_video_id: str
     format: str = "mp4"
+    preview: bool = False
 
 @router.post("/merge")
 async def merge_video_endpoint(request: MergeRequest):
     """
     Эндпоинт объединения видео в TikTok-формате.
     """
+    if settings.EXECUTION_MODE == "queue":
+        return enqueue_operation("merge", request)
     try:
         video_url = merge_videos(
             main_video_id=request.main_video_id,
             background_video_id=request.background_video_id,
-            format=request.format
+            format=request.format,
+            preview=request.preview
         )
         return {"message": "✅ Видео успешно объединено!", "url": video_url}
     except HTTPException as e:
         raise e
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"❌ Внутренняя ошибка сервера: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"❌ Внутренняя ошибка сервера: {str(e)}")
+
+
+# 📌 Модели параметров операций — ими же проверяются задачи из `/queue/add`
+REQUEST_MODELS = {
+    "cut": CutRequest,
+    "convert": ConvertRequest,
+    "resize": ResizeRequest,
+    "crop": CropRequest,
+    "merge": MergeRequest,
+}
@@ -0,0 +1,49 @@
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, ValidationError
+from app.api.endpoints.editor import REQUEST_MODELS
+from app.core.services.jobs import enqueue_job, get_job, remove_job
+
+router = APIRouter()
+
+# 📌 Параметры фоновой генерации прокси
+class ProxyRequest(BaseModel):
+    video_id: str
+
+QUEUE_MODELS = {**REQUEST_MODELS, "proxy": ProxyRequest}
+
+# 📌 Модель запроса
+class QueueRequest(BaseModel):
+    operation: str  # cut, convert, resize, crop, merge, proxy
+    params: dict
+
+# 1️⃣ Добавление задачи в очередь
+@router.post("/add")
+async def add_job(request: QueueRequest):
+    model = QUEUE_MODELS.get(request.operation)
+    if model is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"⛔ Неизвестная операция `{request.operation}`. Доступны: {', '.join(QUEUE_MODELS)}"
+        )
+    # Проверяем параметры сразу, чтобы воркер не повторял заведомо неверную задачу
+    try:
+        params = model(**request.params).dict()
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors())
+    job = enqueue_job(request.operation, params)
+    return {"job_id": job["id"], "status": job["status"]}
+
+# 2️⃣ Статус задачи
+@router.get("/status/{job_id}")
+async def job_status(job_id: str):
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"❌ Задача `{job_id}` не найдена")
+    return job
+
+# 3️⃣ Удаление задачи из очереди
+@router.delete("/remove/{job_id}")
+async def remove(job_id: str):
+    if not remove_job(job_id):
+        raise HTTPException(status_code=409, detail=f"⛔ Задача `{job_id}` не найдена или уже выполняется")
+    return {"message": f"Задача {job_id} удалена из очереди"}
@@ -1,5 +1,8 @@
-from fastapi import APIRouter, File, UploadFile, HTTPException
-from app.core.services.s3 import upload_video, get_video_url, list_videos, delete_video, download_video
+from fastapi import APIRouter, BackgroundTasks, File, UploadFile, HTTPException
+from app.core.services.s3 import settings, store_video, get_video_url, list_videos, delete_video, download_video, get_proxy_id
+from botocore.exceptions import NoCredentialsError
+from app.core.services.video_editor import generate_proxy
+from app.core.services.jobs import enqueue_job
 from fastapi.responses import FileResponse
 import os
 import uuid
@@ -8,12 +11,24 @@ router = APIRouter()
 
 # 1️⃣ Загрузка видео
 @router.post("/upload")
-async def upload(file: UploadFile = File(...)):
+async def upload(background_tasks: BackgroundTasks, file: UploadFile = File(...), proxy: bool = False):
     unique_filename = f"{uuid.uuid4()}_{file.filename}"
-    url = upload_video(file.file, unique_filename)
-    if not url:
+    try:
+        # SHA-256 считается во время загрузки; дубликат становится алиасом существующего объекта
+        video_id, stored_key, duplicate = store_video(file.file, unique_filename)
+    except NoCredentialsError:
         raise HTTPException(status_code=500, detail="Ошибка загрузки в S3")
-    return {"message": "Видео загружено", "url": url}
+    url = f"{settings.S3_ENDPOINT}/{settings.S3_BUCKET_NAME}/{stored_key}"
+    result = {"message": "Видео загружено", "url": url, "video_id": video_id, "duplicate": duplicate}
+
+    # Прокси для быстрого превью создаём в фоне (в режиме `queue` — на воркере), ответ не ждёт FFmpeg
+    if proxy:
+        if settings.EXECUTION_MODE == "queue":
+            result["proxy_job_id"] = enqueue_job("proxy", {"video_id": video_id})["id"]
+        else:
+            background_tasks.add_task(generate_proxy, video_id)
+        result["proxy_id"] = get_proxy_id(stored_key)
+    return result
 
 # 2️⃣ Получение списка видео (СТАТИЧЕСКИЙ РОУТ ДОЛЖЕН ИДТИ ПЕРВЫМ!)
 @router.get("/list")
@@ -11,4 +11,21 @@ class Settings:
     S3_SECRET_KEY = os.getenv("S3_SECRET_KEY", "minioadmin")
     S3_BUCKET_NAME = os.getenv("S3_BUCKET_NAME", "videos")
 
+    # Прокси-версии для быстрого превью
+    PROXY_PREFIX = os.getenv("PROXY_PREFIX", "proxy_")
+    PROXY_HEIGHT = int(os.getenv("PROXY_HEIGHT", "360"))
+    PROXY_GOP = int(os.getenv("PROXY_GOP", "12"))  # 1 = all-intra
+
+    # Дедупликация загрузок: общие данные и индекс sha256 → объект / алиас → объект
+    OBJECTS_PREFIX = os.getenv("OBJECTS_PREFIX", "objects/")
+    DEDUP_INDEX_PREFIX = os.getenv("DEDUP_INDEX_PREFIX", "index/")
+
+    # Очередь задач (манифесты в бакете, захват через аренду)
+    EXECUTION_MODE = os.getenv("EXECUTION_MODE", "inline")  # inline — выполнять в API, queue — только ставить в очередь
+    JOBS_PREFIX = os.getenv("JOBS_PREFIX", "jobs/")
+    JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "60"))
+    JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+    JOB_WAIT_SECONDS = int(os.getenv("JOB_WAIT_SECONDS", "1800"))  # Сколько задача может ждать зависимость (например, прокси)
+    WORKER_POLL_SECONDS = float(os.getenv("WORKER_POLL_SECONDS", "2"))
+
 settings = Settings()
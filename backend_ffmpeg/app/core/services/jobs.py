@@ -0,0 +1,197 @@
+import json
+import time
+import uuid
+from datetime import datetime, timezone
+from app.core.services.s3 import s3, settings, read_json, write_json
+
+# 📌 Очередь задач на общих манифестах в бакете
+# Активные задачи:    {JOBS_PREFIX}active/{job_id}.json
+# Аренды:             {JOBS_PREFIX}leases/{job_id}
+# Завершённые задачи: {JOBS_PREFIX}done/{job_id}.json
+# Захват — создание объекта аренды с If-None-Match, продление и перехват истёкшей аренды — If-Match.
+# Свободные задачи видны по двум листингам (active/ и leases/), манифест читается только после захвата.
+ACTIVE_PREFIX = f"{settings.JOBS_PREFIX}active/"
+LEASES_PREFIX = f"{settings.JOBS_PREFIX}leases/"
+DONE_PREFIX = f"{settings.JOBS_PREFIX}done/"
+
+
+class LeaseLost(Exception):
+    """
+    Аренду задачи перехватил другой воркер.
+    """
+
+
+def _save(key: str, job: dict) -> None:
+    # Манифест меняет только владелец аренды, поэтому запись безусловная
+    job["updated_at"] = time.time()
+    s3.put_object(
+        Bucket=settings.S3_BUCKET_NAME,
+        Key=key,
+        Body=json.dumps(job).encode(),
+        ContentType="application/json"
+    )
+
+
+def _list(prefix: str) -> dict:
+    paginator = s3.get_paginator("list_objects_v2")
+    return {
+        obj["Key"][len(prefix):]: obj
+        for page in paginator.paginate(Bucket=settings.S3_BUCKET_NAME, Prefix=prefix)
+        for obj in page.get("Contents", [])
+    }
+
+
+def _take_lease(job_id: str, worker_id: str, etag: str = None):
+    """
+    Создаёт (без `etag`) или перезаписывает (с `etag`) объект аренды.
+
+    :return: Новый ETag; None, если аренду держит или уже перехватил другой
+    """
+    return write_json(f"{LEASES_PREFIX}{job_id}", {"worker": worker_id, "taken_at": time.time()}, etag)
+
+
+def _drop_lease(job_id: str) -> None:
+    s3.delete_object(Bucket=settings.S3_BUCKET_NAME, Key=f"{LEASES_PREFIX}{job_id}")
+
+
+def enqueue_job(operation: str, params: dict) -> dict:
+    """
+    Ставит задачу в очередь.
+
+    :param operation: Имя операции (`cut`, `convert`, ...)
+    :param params: Аргументы операции
+    :return: Манифест задачи
+    """
+    job = {
+        "id": uuid.uuid4().hex,
+        "operation": operation,
+        "params": params,
+        "status": "queued",
+        "worker": None,
+        "attempts": 0,
+        "result": None,
+        "error": None,
+        "created_at": time.time(),
+        "updated_at": time.time(),
+    }
+    write_json(f"{ACTIVE_PREFIX}{job['id']}.json", job)
+    return job
+
+
+def get_job(job_id: str):
+    """
+    Возвращает манифест задачи или None, если её нет.
+    """
+    for prefix in (ACTIVE_PREFIX, DONE_PREFIX):
+        job, _ = read_json(f"{prefix}{job_id}.json")
+        if job is not None:
+            return job
+    return None
+
+
+def remove_job(job_id: str) -> bool:
+    """
+    Удаляет задачу из очереди, если её ещё не захватил воркер.
+
+    :return: True, если задача удалена
+    """
+    key = f"{ACTIVE_PREFIX}{job_id}.json"
+    job, _ = read_json(key)
+    if job is None or job["status"] != "queued":
+        return False
+    # Берём аренду сами, чтобы не удалить задачу, которую как раз захватывают
+    if not _take_lease(job_id, "remove"):
+        return False
+    job["status"] = "cancelled"
+    _finish(key, job)
+    return True
+
+
+def claim_job(worker_id: str):
+    """
+    Захватывает самую старую доступную задачу: без аренды или с истёкшей арендой (упавший воркер).
+
+    :return: Кортеж (job, lease_etag) или None, если задач нет
+    """
+    now = datetime.now(timezone.utc)
+    leases = _list(LEASES_PREFIX)
+    for name, obj in sorted(_list(ACTIVE_PREFIX).items(), key=lambda item: item[1]["LastModified"]):
+        job_id = name[:-len(".json")]
+        lease = leases.get(job_id)
+        if lease is None:
+            etag = _take_lease(job_id, worker_id)
+        elif (now - lease["LastModified"]).total_seconds() > settings.JOB_LEASE_SECONDS:
+            etag = _take_lease(job_id, worker_id, lease["ETag"])  # Воркер упал — аренда истекла
+        else:
+            continue  # Задача выполняется
+        if not etag:
+            continue  # Задачу перехватил другой воркер
+
+        key = f"{ACTIVE_PREFIX}{name}"
+        job, _ = read_json(key)
+        if job is None:
+            _drop_lease(job_id)  # Задачу уже завершили и перенесли
+            continue
+
+        if job["attempts"] >= settings.JOB_MAX_ATTEMPTS:
+            job["status"] = "failed"
+            job["error"] = job["error"] or "⛔ Превышено число попыток"
+            _finish(key, job)
+            continue
+
+        job["status"] = "running"
+        job["worker"] = worker_id
+        job["attempts"] += 1
+        _save(key, job)
+        return job, etag
+    return None
+
+
+def heartbeat(job: dict, etag: str) -> str:
+    """
+    Продлевает аренду задачи.
+
+    :return: Новый ETag
+    :raises LeaseLost: Если аренду перехватили
+    """
+    new_etag = _take_lease(job["id"], job["worker"], etag)
+    if not new_etag:
+        raise LeaseLost(job["id"])
+    return new_etag
+
+
+def complete_job(job: dict, etag: str, result=None, error: str = None, retry: bool = True, wait: bool = False) -> None:
+    """
+    Фиксирует результат задачи и переносит её в завершённые.
+    При ошибке задача возвращается в очередь, пока не исчерпаны попытки (если `retry`).
+    С `wait` (зависимость ещё не готова) задача возвращается в очередь без траты попытки,
+    но не раньше истечения аренды и не дольше JOB_WAIT_SECONDS с момента постановки.
+
+    :raises LeaseLost: Если аренду перехватили
+    """
+    heartbeat(job, etag)  # Убеждаемся, что аренда всё ещё наша
+    key = f"{ACTIVE_PREFIX}{job['id']}.json"
+    if error is None:
+        job["status"] = "done"
+        job["result"] = result
+    elif wait and time.time() - job["created_at"] < settings.JOB_WAIT_SECONDS:
+        job["error"] = error
+        job["status"] = "queued"
+        job["attempts"] -= 1
+        _save(key, job)
+        return  # Аренду не снимаем — задачу заберут снова, когда она истечёт
+    else:
+        job["error"] = error
+        job["status"] = "queued" if retry and job["attempts"] < settings.JOB_MAX_ATTEMPTS else "failed"
+
+    if job["status"] == "queued":
+        _save(key, job)
+        _drop_lease(job["id"])
+    else:
+        _finish(key, job)
+
+
+def _finish(key: str, job: dict) -> None:
+    _save(f"{DONE_PREFIX}{job['id']}.json", job)
+    s3.delete_object(Bucket=settings.S3_BUCKET_NAME, Key=key)
+    _drop_lease(job["id"])
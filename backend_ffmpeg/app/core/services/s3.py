@@ -1,5 +1,8 @@
 import boto3
-from botocore.exceptions import NoCredentialsError
+import hashlib
+import json
+import uuid
+from botocore.exceptions import ClientError, NoCredentialsError
 from app.core.config import settings
 from fastapi.responses import FileResponse
 from fastapi import HTTPException
@@ -14,40 +17,208 @@ s3 = boto3.client(
 )
 
 # Функция загрузки видео
-def upload_video(file, filename):
+def upload_video(file, filename, metadata=None):
     try:
-        s3.upload_fileobj(file, settings.S3_BUCKET_NAME, filename)
+        extra_args = {"Metadata": metadata} if metadata else None
+        s3.upload_fileobj(file, settings.S3_BUCKET_NAME, filename, ExtraArgs=extra_args)
         return f"{settings.S3_ENDPOINT}/{settings.S3_BUCKET_NAME}/{filename}"
     except NoCredentialsError:
         return None
 
+# 📌 Дедупликация загрузок по SHA-256
+# Данные лежат один раз под {OBJECTS_PREFIX}<uuid><ext>, video_id — только алиас на них.
+# Индекс — по одному JSON-объекту на хэш и на алиас:
+#   {DEDUP_INDEX_PREFIX}hash/<sha256>.json   {"key": storage_key | None, "aliases": [video_id, ...]}
+#   {DEDUP_INDEX_PREFIX}alias/<video_id>.json {"sha256": sha256, "key": storage_key}
+#   {DEDUP_INDEX_PREFIX}refs/<storage_name>/<video_id>  пустой маркер — чтобы list_videos строил список по одному листингу
+# Манифест хэша меняется только условной записью (If-Match / If-None-Match),
+# поэтому одновременные загрузки и удаления на разных узлах не теряют изменений.
+HASH_PREFIX = f"{settings.DEDUP_INDEX_PREFIX}hash/"
+ALIAS_PREFIX = f"{settings.DEDUP_INDEX_PREFIX}alias/"
+REFS_PREFIX = f"{settings.DEDUP_INDEX_PREFIX}refs/"
+
+
+def get_ref_key(storage_key, video_id):
+    return f"{REFS_PREFIX}{os.path.basename(storage_key)}/{video_id}"
+
+
+class HashingReader:
+    """
+    Обёртка над файлом: считает SHA-256 по мере чтения (без второго прохода).
+    """
+    def __init__(self, file):
+        self.file = file
+        self.sha256 = hashlib.sha256()
+
+    def read(self, size=-1):
+        chunk = self.file.read(size)
+        self.sha256.update(chunk)
+        return chunk
+
+    def hexdigest(self):
+        return self.sha256.hexdigest()
+
+
+def read_json(key):
+    """
+    Читает JSON-объект из бакета.
+
+    :return: Кортеж (data, etag); (None, None), если объекта нет
+    """
+    try:
+        response = s3.get_object(Bucket=settings.S3_BUCKET_NAME, Key=key)
+        return json.loads(response["Body"].read()), response["ETag"]
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+            return None, None
+        raise
+
+
+def write_json(key, data, etag=None):
+    """
+    Условно записывает JSON-объект: с `etag` — только если объект не менялся, без него — только если его ещё нет.
+
+    :return: Новый ETag; None, если условие не выполнено (объект изменил кто-то другой)
+    """
+    condition = {"IfMatch": etag} if etag else {"IfNoneMatch": "*"}
+    try:
+        response = s3.put_object(
+            Bucket=settings.S3_BUCKET_NAME,
+            Key=key,
+            Body=json.dumps(data).encode(),
+            ContentType="application/json",
+            **condition
+        )
+        return response["ETag"]
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("PreconditionFailed", "412", "ConditionalRequestConflict"):
+            return None
+        raise
+
+
+# Функция загрузки видео с дедупликацией: возвращает (video_id, storage_key, duplicate)
+def store_video(file, filename):
+    storage_key = f"{settings.OBJECTS_PREFIX}{uuid.uuid4().hex}{os.path.splitext(filename)[1]}"
+    reader = HashingReader(file)
+    s3.upload_fileobj(reader, settings.S3_BUCKET_NAME, storage_key)
+    digest = reader.hexdigest()
+    hash_key = f"{HASH_PREFIX}{digest}.json"
+
+    # Добавляем алиас в манифест хэша; при конфликте перечитываем и повторяем
+    while True:
+        entry, etag = read_json(hash_key)
+        if entry is None or entry["key"] is None:
+            # Новые данные (или все прежние алиасы удалены) — наш объект становится общим
+            entry = {"key": storage_key, "aliases": [filename]}
+            duplicate = False
+        else:
+            entry["aliases"].append(filename)
+            duplicate = True
+        if write_json(hash_key, entry, etag):
+            break
+
+    # Такие данные уже есть — копию не храним
+    if duplicate:
+        s3.delete_object(Bucket=settings.S3_BUCKET_NAME, Key=storage_key)
+        print(f"♻️ Дубликат {filename} → {entry['key']} (sha256={digest})")
+
+    # Алиас уже учтён в манифесте хэша: если записать его не удалось — откатываем ссылку
+    try:
+        if not write_json(f"{ALIAS_PREFIX}{filename}.json", {"sha256": digest, "key": entry["key"]}):
+            raise RuntimeError(f"Алиас {filename} уже существует")
+        s3.put_object(Bucket=settings.S3_BUCKET_NAME, Key=get_ref_key(entry["key"], filename), Body=b"")
+    except Exception:
+        s3.delete_object(Bucket=settings.S3_BUCKET_NAME, Key=f"{ALIAS_PREFIX}{filename}.json")
+        release_alias(digest, filename)
+        raise
+    return filename, entry["key"], duplicate
+
+
+# Функция получения реального ключа в S3 по video_id (алиасу)
+def resolve_video_id(video_id):
+    alias, _ = read_json(f"{ALIAS_PREFIX}{video_id}.json")
+    if alias is None:
+        return video_id  # Видео загружено без дедупликации
+    return alias["key"]
+
+
+# Функция получения имени прокси-версии видео
+def get_proxy_id(video_id):
+    return f"{settings.PROXY_PREFIX}{os.path.splitext(os.path.basename(video_id))[0]}.mp4"
+
 # Функция получения URL видео
 def get_video_url(video_id):
-    return f"{settings.S3_ENDPOINT}/{settings.S3_BUCKET_NAME}/{video_id}"
+    return f"{settings.S3_ENDPOINT}/{settings.S3_BUCKET_NAME}/{resolve_video_id(video_id)}"
 
 # Функция получения списка видео
 def list_videos():
     try:
-        response = s3.list_objects_v2(Bucket=settings.S3_BUCKET_NAME)
-
-        if "Contents" not in response:
-            return []
-
-        return [
-            {
+        paginator = s3.get_paginator("list_objects_v2")
+        objects = {
+            obj["Key"]: {
                 "Key": obj["Key"],
                 "LastModified": obj["LastModified"].isoformat(),  # ✅ Конвертируем datetime в строку
                 "Size": obj["Size"]
             }
-            for obj in response["Contents"]
-        ]
+            for page in paginator.paginate(Bucket=settings.S3_BUCKET_NAME)
+            for obj in page.get("Contents", [])
+        }
+
+        # Служебные объекты не показываем
+        hidden = (settings.PROXY_PREFIX, settings.DEDUP_INDEX_PREFIX, settings.OBJECTS_PREFIX, settings.JOBS_PREFIX)
+        files = [obj for key, obj in objects.items() if not key.startswith(hidden)]
+
+        # Алиасы показываем с размером общего объекта: refs/<storage_name>/<video_id> есть в том же листинге
+        for key in objects:
+            if not key.startswith(REFS_PREFIX):
+                continue
+            storage_name, _, alias = key[len(REFS_PREFIX):].partition("/")
+            stored = objects.get(f"{settings.OBJECTS_PREFIX}{storage_name}")
+            if stored:
+                files.append({**stored, "Key": alias})
+        return files
 
     except Exception as e:
         return []
 
 # Функция удаления видео
 def delete_video(video_id):
-    s3.delete_object(Bucket=settings.S3_BUCKET_NAME, Key=video_id)
+    alias_key = f"{ALIAS_PREFIX}{video_id}.json"
+    alias, _ = read_json(alias_key)
+
+    if alias is None:
+        # Видео без дедупликации; общие данные и индекс напрямую удалять нельзя
+        if video_id.startswith((settings.OBJECTS_PREFIX, settings.DEDUP_INDEX_PREFIX)):
+            raise HTTPException(status_code=400, detail=f"⛔ `{video_id}` — служебный объект, удалите видео по его video_id.")
+        s3.delete_object(Bucket=settings.S3_BUCKET_NAME, Key=video_id)
+        s3.delete_object(Bucket=settings.S3_BUCKET_NAME, Key=get_proxy_id(video_id))  # Удаляем прокси, если есть
+        return
+
+    # Сначала удаляем алиас — повторный DELETE уже ничего не найдёт
+    s3.delete_object(Bucket=settings.S3_BUCKET_NAME, Key=alias_key)
+    s3.delete_object(Bucket=settings.S3_BUCKET_NAME, Key=get_ref_key(alias["key"], video_id))
+    release_alias(alias["sha256"], video_id)
+
+
+# Функция снятия ссылки алиаса на общие данные; данные удаляются вместе с последней ссылкой
+def release_alias(digest, video_id):
+    hash_key = f"{HASH_PREFIX}{digest}.json"
+    while True:
+        entry, etag = read_json(hash_key)
+        if entry is None or video_id not in entry["aliases"]:
+            return
+        entry["aliases"].remove(video_id)
+        storage_key = entry["key"]
+        if not entry["aliases"]:
+            entry["key"] = None  # На данные больше никто не ссылается
+        if write_json(hash_key, entry, etag):
+            break
+
+    # На данные ещё ссылаются другие алиасы — удаляем только алиас
+    if entry["key"] is not None:
+        return
+    s3.delete_object(Bucket=settings.S3_BUCKET_NAME, Key=storage_key)
+    s3.delete_object(Bucket=settings.S3_BUCKET_NAME, Key=get_proxy_id(storage_key))  # Удаляем прокси, если есть
 
 # ✅ Функция скачивания видео из S3 и передачи пользователю
 def download_video(video_id):
@@ -55,7 +226,7 @@ def download_video(video_id):
 
     try:
         # Загружаем файл из S3 в локальное хранилище
-        s3.download_file(settings.S3_BUCKET_NAME, video_id, local_file)
+        s3.download_file(settings.S3_BUCKET_NAME, resolve_video_id(video_id), local_file)
 
         # Проверяем, существует ли скачанный файл
         if not os.path.exists(local_file):
@@ -1,12 +1,116 @@
 import subprocess
+import json
 import os
 import uuid
 from fastapi import HTTPException
-from app.core.services.s3 import s3, settings, upload_video
+from app.core.services.s3 import s3, settings, upload_video, get_proxy_id, resolve_video_id
 import cv2
 
 
-def cut_video(video_id: str, start_time: float, end_time: float, format: str = None) -> dict:
+def get_preview_source(video_id: str):
+    """
+    Возвращает прокси-версию видео для превью и коэффициенты масштаба прокси/оригинал по осям.
+
+    :param video_id: Имя исходного видео в S3
+    :return: Кортеж (proxy_id, (scale_x, scale_y))
+    """
+    source_id = resolve_video_id(video_id)
+    proxy_id = get_proxy_id(source_id)
+    try:
+        response = s3.head_object(Bucket=settings.S3_BUCKET_NAME, Key=proxy_id)
+    except Exception:
+        raise HTTPException(status_code=409, detail=f"⏳ Прокси для `{video_id}` ещё не готов. Загрузите видео с `proxy=true` или повторите позже.")
+
+    metadata = response.get("Metadata", {})
+    try:
+        proxy_width, proxy_height = int(metadata["proxy-width"]), int(metadata["proxy-height"])
+        source_width, source_height = int(metadata["source-width"]), int(metadata["source-height"])
+    except (KeyError, ValueError):
+        # Размеров в метаданных нет — читаем заголовки обоих файлов по presigned URL, не скачивая их
+        proxy_width, proxy_height = get_video_resolution(get_presigned_url(proxy_id))
+        source_width, source_height = get_video_resolution(get_presigned_url(source_id))
+    return proxy_id, (proxy_width / source_width, proxy_height / source_height)
+
+
+def get_presigned_url(key: str) -> str:
+    """
+    Временная ссылка на объект в S3 (для ffprobe).
+    """
+    return s3.generate_presigned_url("get_object", Params={"Bucket": settings.S3_BUCKET_NAME, "Key": key}, ExpiresIn=300)
+
+
+def generate_proxy(video_id: str, raise_errors: bool = False) -> None:
+    """
+    Создаёт лёгкую прокси-версию видео (низкое разрешение, короткий GOP) для быстрого превью.
+    Запускается в фоне после загрузки. FPS и длительность не меняются,
+    поэтому тайм-коды прокси совпадают с оригиналом.
+
+    :param video_id: Имя исходного видео в S3
+    :param raise_errors: Пробрасывать ошибку (в задаче очереди — чтобы её записали и повторили)
+    """
+    unique_id = uuid.uuid4().hex
+    video_id = resolve_video_id(video_id)
+    proxy_id = get_proxy_id(video_id)
+    input_file = f"/tmp/{unique_id}_{os.path.basename(video_id)}"
+    output_file = f"/tmp/{unique_id}_{proxy_id}"
+
+    # Прокси уже есть (например, у дубликата) — повторно не кодируем
+    try:
+        s3.head_object(Bucket=settings.S3_BUCKET_NAME, Key=proxy_id)
+        print(f"✅ Прокси уже существует: {proxy_id}")
+        return
+    except Exception:
+        pass
+
+    try:
+        # 1️⃣ Скачиваем оригинал из S3
+        print(f"🚀 Скачивание видео для прокси: {video_id}")
+        s3.download_file(settings.S3_BUCKET_NAME, video_id, input_file)
+        source_width, source_height = get_video_resolution(input_file)
+
+        # 2️⃣ Кодируем прокси: маленькое разрешение, ключевой кадр каждые PROXY_GOP кадров
+        command = [
+            "ffmpeg", "-y", "-hwaccel", "cuda",
+            "-loglevel", "warning",
+            "-i", input_file,
+            "-map", "0:v:0", "-map", "0:a?",
+            "-vf", f"scale=-2:'min({settings.PROXY_HEIGHT},ih)'",
+            "-c:v", "h264_nvenc", "-preset", "p1", "-b:v", "1M",
+            "-g", str(settings.PROXY_GOP), "-bf", "0",  # Короткий GOP — быстрый seek
+            "-pix_fmt", "yuv420p",
+            "-c:a", "aac", "-b:a", "64k",
+            "-movflags", "+faststart",
+            output_file
+        ]
+
+        print(f"🔥 FFmpeg команда: {' '.join(command)}")
+        subprocess.run(command, check=True)
+        proxy_width, proxy_height = get_video_resolution(output_file)
+
+        # 3️⃣ Загружаем прокси в S3 вместе с размерами оригинала
+        with open(output_file, "rb") as f:
+            upload_video(f, proxy_id, metadata={
+                "source-width": str(source_width),
+                "source-height": str(source_height),
+                "proxy-width": str(proxy_width),
+                "proxy-height": str(proxy_height),
+            })
+        print(f"✅ Прокси загружен в S3: {proxy_id}")
+
+    except Exception as e:
+        # Фоновая задача — ответ уже отправлен, просто логируем
+        print(f"❌ Ошибка создания прокси для {video_id}: {str(e)}")
+        if raise_errors:
+            raise
+
+    finally:
+        # 4️⃣ Удаляем временные файлы
+        for path in (input_file, output_file):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def cut_video(video_id: str, start_time: float, end_time: float, format: str = None, preview: bool = False) -> dict:
     """
     Нарезает видео с помощью FFmpeg с использованием NVIDIA NVENC (h264_nvenc).
 
@@ -14,6 +118,7 @@ def cut_video(video_id: str, start_time: float, end_time: float, format: str = N
     :param start_time: Начало нарезки (секунды)
     :param end_time: Конец нарезки (секунды)
     :param format: Формат выходного видео (если None — сохраняем оригинальный)
+    :param preview: Работать с прокси-версией (быстрое превью)
     :return: JSON-ответ (URL или ошибка)
     """
 
@@ -23,7 +128,8 @@ def cut_video(video_id: str, start_time: float, end_time: float, format: str = N
             raise HTTPException(status_code=400, detail="⛔ Неверные временные метки: `start_time` должен быть >= 0, `end_time` должен быть больше `start_time`.")
 
         unique_id = uuid.uuid4().hex  # Генерируем уникальный ID
-        input_file = f"/tmp/{video_id}"
+        source_id, proxy_scale = get_preview_source(video_id) if preview else (resolve_video_id(video_id), (1.0, 1.0))  # Для превью берём прокси
+        input_file = f"/tmp/{unique_id}_{os.path.basename(source_id)}"  # Одинаковые данные у разных алиасов — свой файл на запрос
 
         # 2️⃣ Получаем оригинальный формат файла
         if format is None:
@@ -33,7 +139,7 @@ def cut_video(video_id: str, start_time: float, end_time: float, format: str = N
 
         # 3️⃣ ПРОВЕРЯЕМ, СУЩЕСТВУЕТ ЛИ ВИДЕО В MinIO
         try:
-            response = s3.head_object(Bucket=settings.S3_BUCKET_NAME, Key=video_id)
+            response = s3.head_object(Bucket=settings.S3_BUCKET_NAME, Key=source_id)
             file_size = response["ContentLength"]
             if file_size == 0:
                 raise HTTPException(status_code=400, detail=f"⚠️ Видео `{video_id}` пустое.")
@@ -43,7 +149,7 @@ def cut_video(video_id: str, start_time: float, end_time: float, format: str = N
         # 4️⃣ Скачиваем видео из S3
         try:
             print(f"🚀 Скачивание видео: {video_id}")
-            s3.download_file(settings.S3_BUCKET_NAME, video_id, input_file)
+            s3.download_file(settings.S3_BUCKET_NAME, source_id, input_file)
             print(f"✅ Видео скачано: {input_file}")
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"❌ Ошибка скачивания видео: {str(e)}")
@@ -80,7 +186,7 @@ def cut_video(video_id: str, start_time: float, end_time: float, format: str = N
         os.remove(output_file)
 
         # 8️⃣ Возвращаем JSON-ответ
-        return {"message": "✅ Видео успешно нарезано!", "url": f"{settings.S3_ENDPOINT}/{settings.S3_BUCKET_NAME}/{unique_id}.{format}"}
+        return {"message": "✅ Видео успешно нарезано!", "url": f"{settings.S3_ENDPOINT}/{settings.S3_BUCKET_NAME}/{unique_id}.{format}", "preview": preview}
 
     except HTTPException as e:
         # Если поймали `HTTPException`, просто возвращаем её
@@ -92,12 +198,109 @@ def cut_video(video_id: str, start_time: float, end_time: float, format: str = N
 
 
 
-def convert_video(video_id: str, target_format: str) -> dict:
+# 📌 Матрица совместимости: какие кодеки можно положить в контейнер без перекодирования
+CONTAINER_CODECS = {
+    "mp4": {
+        "video": {"h264", "hevc", "mpeg4", "av1", "vp9"},
+        "audio": {"aac", "mp3", "ac3", "eac3", "alac", "opus", "flac"},
+    },
+    "mov": {
+        "video": {"h264", "hevc", "mpeg4", "prores", "mjpeg"},
+        "audio": {"aac", "mp3", "ac3", "alac", "pcm_s16le", "pcm_s24le"},
+    },
+    "mkv": {
+        "video": {"h264", "hevc", "mpeg4", "av1", "vp8", "vp9", "mpeg2video", "prores", "mjpeg"},
+        "audio": {"aac", "mp3", "ac3", "eac3", "opus", "vorbis", "flac", "alac", "pcm_s16le", "pcm_s24le"},
+    },
+    "avi": {
+        "video": {"h264", "mpeg4", "mjpeg", "mpeg2video"},
+        "audio": {"mp3", "ac3", "pcm_s16le"},
+    },
+}
+
+
+def get_stream_codecs(file_path: str):
+    """
+    Получает кодеки первого видео- и аудиопотока с помощью ffprobe.
+    В `convert_video` в выходной файл попадают именно эти потоки (`-map 0:v:0? -map 0:a:0?`).
+
+    :return: Кортеж (video_codec, audio_codec); None, если потока нет
+    """
+    try:
+        result = subprocess.run(
+            [
+                "ffprobe",
+                "-v", "error",
+                "-show_entries", "stream=codec_type,codec_name",
+                "-of", "json",
+                file_path
+            ],
+            capture_output=True,
+            text=True,
+            check=True
+        )
+        streams = json.loads(result.stdout).get("streams", [])
+    except Exception as e:
+        raise RuntimeError(f"❌ Ошибка при получении кодеков видео: {str(e)}")
+
+    video_codec = next((s.get("codec_name") for s in streams if s.get("codec_type") == "video"), None)
+    audio_codec = next((s.get("codec_name") for s in streams if s.get("codec_type") == "audio"), None)
+    return video_codec, audio_codec
+
+
+def can_copy_stream(codec: str, target_format: str, stream_type: str) -> bool:
+    """
+    Проверяет, можно ли скопировать поток (`-c copy`) в целевой контейнер.
+    Отсутствующий поток считается «копируемым» — перекодировать нечего.
+    """
+    if codec is None:
+        return True
+    return codec in CONTAINER_CODECS.get(target_format.lower(), {}).get(stream_type, set())
+
+
+def get_conversion_mode(video_codec: str, audio_codec: str, copy_video: bool, copy_audio: bool) -> str:
+    """
+    Возвращает путь конвертации: `remux`, `transcode_audio`, `transcode_video` или `transcode`.
+    """
+    transcode_video = video_codec is not None and not copy_video
+    transcode_audio = audio_codec is not None and not copy_audio
+    if transcode_video and transcode_audio:
+        return "transcode"
+    if transcode_video:
+        return "transcode_video"
+    if transcode_audio:
+        return "transcode_audio"
+    return "remux"
+
+
+def build_convert_command(input_file: str, output_file: str, target_format: str, video_codec: str, copy_video: bool, copy_audio: bool) -> list:
+    """
+    Формирует команду FFmpeg для конвертации: совместимые потоки копируются, остальные перекодируются.
+    """
+    command = ["ffmpeg", "-y"]
+    if not copy_video:
+        command += ["-hwaccel", "cuda", "-hwaccel_output_format", "cuda"]  # Включаем NVENC
+    command += ["-i", input_file]
+    command += ["-map", "0:v:0?", "-map", "0:a:0?", "-sn", "-dn"]  # Берём ровно те потоки, что проверили ffprobe
+    command += ["-c:v", "copy"] if copy_video else ["-c:v", "h264_nvenc", "-preset", "p4", "-b:v", "5M"]
+    if copy_video and video_codec == "h264" and target_format.lower() == "avi":
+        command += ["-bsf:v", "h264_mp4toannexb"]  # AVI ждёт Annex B, а не AVCC из MP4/MOV/MKV
+    command += ["-c:a", "copy"] if copy_audio else ["-c:a", "aac", "-b:a", "128k"]
+    if target_format.lower() in ("mp4", "mov"):
+        command += ["-movflags", "+faststart"]  # moov-атом в начале файла
+    command.append(output_file)
+    return command
+
+
+def convert_video(video_id: str, target_format: str, preview: bool = False) -> dict:
     """
     Конвертирует видео в другой формат с помощью FFmpeg и NVENC.
+    Потоки, совместимые с целевым контейнером, копируются без перекодирования (remux),
+    перекодируются только несовместимые.
 
     :param video_id: Имя исходного видео в S3
     :param target_format: Формат конвертации (mp4, avi, mov, mkv)
+    :param preview: Работать с прокси-версией (быстрое превью)
     :return: JSON-ответ (URL или ошибка)
     """
 
@@ -111,12 +314,13 @@ def convert_video(video_id: str, target_format: str) -> dict:
             )
 
         unique_id = uuid.uuid4().hex  # Генерируем уникальный ID
-        input_file = f"/tmp/{video_id}"
+        source_id, proxy_scale = get_preview_source(video_id) if preview else (resolve_video_id(video_id), (1.0, 1.0))  # Для превью берём прокси
+        input_file = f"/tmp/{unique_id}_{os.path.basename(source_id)}"
         output_file = f"/tmp/{unique_id}.{target_format}"  # Файл с новым форматом
 
         # 2️⃣ ПРОВЕРЯЕМ, СУЩЕСТВУЕТ ЛИ ВИДЕО В MinIO
         try:
-            response = s3.head_object(Bucket=settings.S3_BUCKET_NAME, Key=video_id)
+            response = s3.head_object(Bucket=settings.S3_BUCKET_NAME, Key=source_id)
             file_size = response["ContentLength"]
             if file_size == 0:
                 raise HTTPException(status_code=400, detail=f"⚠️ Видео `{video_id}` пустое.")
@@ -126,29 +330,41 @@ def convert_video(video_id: str, target_format: str) -> dict:
         # 3️⃣ Скачиваем видео из S3
         try:
             print(f"🚀 Скачивание видео: {video_id}")
-            s3.download_file(settings.S3_BUCKET_NAME, video_id, input_file)
+            s3.download_file(settings.S3_BUCKET_NAME, source_id, input_file)
             print(f"✅ Видео скачано: {input_file}")
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"❌ Ошибка скачивания видео: {str(e)}")
 
-        # 4️⃣ Выполняем конвертацию через FFmpeg с H.264 NVENC
-        command = [
-            "ffmpeg", "-y", "-hwaccel", "cuda", "-hwaccel_output_format", "cuda",  # Включаем NVENC
-            "-i", input_file,
-            "-c:v", "h264_nvenc", "-preset", "p4", "-b:v", "5M",  # Кодек NVENC
-            "-c:a", "aac", "-b:a", "128k",  # Аудио кодек AAC
-            output_file
-        ]
+        # 4️⃣ Определяем кодеки и решаем, какие потоки можно скопировать без перекодирования
+        video_codec, audio_codec = get_stream_codecs(input_file)
+        copy_video = can_copy_stream(video_codec, target_format, "video")
+        copy_audio = can_copy_stream(audio_codec, target_format, "audio")
+        mode = get_conversion_mode(video_codec, audio_codec, copy_video, copy_audio)
+        print(f"🎞 Кодеки: video={video_codec}, audio={audio_codec} → режим `{mode}`")
 
+        # 5️⃣ Выполняем конвертацию через FFmpeg (copy для совместимых потоков, NVENC/AAC для остальных)
+        command = build_convert_command(input_file, output_file, target_format, video_codec, copy_video, copy_audio)
         print(f"🔥 FFmpeg команда: {' '.join(command)}")  # Логируем команду FFmpeg
 
         try:
             subprocess.run(command, check=True)
-            print(f"✅ Видео конвертировано: {output_file}")
+            print(f"✅ Видео конвертировано ({mode}): {output_file}")
         except subprocess.CalledProcessError as e:
-            raise HTTPException(status_code=500, detail=f"❌ Ошибка FFmpeg: {str(e)}")
-
-        # 5️⃣ Загружаем сконвертированное видео обратно в S3
+            if mode == "transcode":
+                raise HTTPException(status_code=500, detail=f"❌ Ошибка FFmpeg: {str(e)}")
+
+            # Копирование не удалось — повторяем с полным перекодированием, как раньше
+            print(f"⚠️ Ошибка FFmpeg в режиме `{mode}`, перекодируем полностью: {str(e)}")
+            copy_video, copy_audio, mode = False, False, "transcode"
+            command = build_convert_command(input_file, output_file, target_format, video_codec, copy_video, copy_audio)
+            print(f"🔥 FFmpeg команда: {' '.join(command)}")
+            try:
+                subprocess.run(command, check=True)
+                print(f"✅ Видео конвертировано ({mode}): {output_file}")
+            except subprocess.CalledProcessError as e:
+                raise HTTPException(status_code=500, detail=f"❌ Ошибка FFmpeg: {str(e)}")
+
+        # 6️⃣ Загружаем сконвертированное видео обратно в S3
         try:
             with open(output_file, "rb") as f:
                 upload_video(f, f"{unique_id}.{target_format}")
@@ -156,12 +372,19 @@ def convert_video(video_id: str, target_format: str) -> dict:
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"❌ Ошибка загрузки в S3: {str(e)}")
 
-        # 6️⃣ Удаляем временные файлы
+        # 7️⃣ Удаляем временные файлы
         os.remove(input_file)
         os.remove(output_file)
 
-        # 7️⃣ Возвращаем JSON-ответ
-        return {"message": "✅ Видео успешно конвертировано!", "url": f"{settings.S3_ENDPOINT}/{settings.S3_BUCKET_NAME}/{unique_id}.{target_format}"}
+        # 8️⃣ Возвращаем JSON-ответ
+        return {
+            "message": "✅ Видео успешно конвертировано!",
+            "url": f"{settings.S3_ENDPOINT}/{settings.S3_BUCKET_NAME}/{unique_id}.{target_format}",
+            "mode": mode,
+            "video": "copy" if copy_video else "transcode",
+            "audio": "copy" if copy_audio else "transcode",
+            "preview": preview,
+        }
 
     except HTTPException as e:
         # Если поймали `HTTPException`, просто возвращаем её
@@ -172,13 +395,14 @@ def convert_video(video_id: str, target_format: str) -> dict:
         raise HTTPException(status_code=500, detail=f"❌ Внутренняя ошибка сервера: {str(e)}")
 
 
-def resize_video(video_id: str, resolution: str, format: str = "mp4") -> dict:
+def resize_video(video_id: str, resolution: str, format: str = "mp4", preview: bool = False) -> dict:
     """
     Изменяет разрешение видео с помощью FFmpeg и NVENC.
 
     :param video_id: Имя исходного видео в S3
     :param resolution: Новое разрешение (например, "1280x720")
     :param format: Формат выходного видео (по умолчанию MP4)
+    :param preview: Работать с прокси-версией (быстрое превью)
     :return: JSON-ответ (URL или ошибка)
     """
 
@@ -195,12 +419,13 @@ def resize_video(video_id: str, resolution: str, format: str = "mp4") -> dict:
             )
 
         unique_id = uuid.uuid4().hex  # Генерируем уникальный ID
-        input_file = f"/tmp/{video_id}"
+        source_id, proxy_scale = get_preview_source(video_id) if preview else (resolve_video_id(video_id), (1.0, 1.0))  # Для превью берём прокси
+        input_file = f"/tmp/{unique_id}_{os.path.basename(source_id)}"
         output_file = f"/tmp/{unique_id}.{format}"  # Файл с новым разрешением
 
         # 2️⃣ ПРОВЕРЯЕМ, СУЩЕСТВУЕТ ЛИ ВИДЕО В MinIO
         try:
-            response = s3.head_object(Bucket=settings.S3_BUCKET_NAME, Key=video_id)
+            response = s3.head_object(Bucket=settings.S3_BUCKET_NAME, Key=source_id)
             file_size = response["ContentLength"]
             if file_size == 0:
                 raise HTTPException(status_code=400, detail=f"⚠️ Видео `{video_id}` пустое.")
@@ -210,11 +435,16 @@ def resize_video(video_id: str, resolution: str, format: str = "mp4") -> dict:
         # 3️⃣ Скачиваем видео из S3
         try:
             print(f"🚀 Скачивание видео: {video_id}")
-            s3.download_file(settings.S3_BUCKET_NAME, video_id, input_file)
+            s3.download_file(settings.S3_BUCKET_NAME, source_id, input_file)
             print(f"✅ Видео скачано: {input_file}")
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"❌ Ошибка скачивания видео: {str(e)}")
 
+        # 🔎 Для превью уменьшаем целевое разрешение пропорционально прокси
+        if preview:
+            width = max(2, int(width * proxy_scale[0]) // 2 * 2)
+            height = max(2, int(height * proxy_scale[1]) // 2 * 2)
+
         # 4️⃣ Проверяем, поддерживается ли `scale_cuda`
         scale_filter = f"scale_cuda={width}:{height}:force_original_aspect_ratio=decrease" if check_scale_cuda() else f"scale={width}:{height}:force_original_aspect_ratio=decrease"
 
@@ -249,7 +479,7 @@ def resize_video(video_id: str, resolution: str, format: str = "mp4") -> dict:
         os.remove(output_file)
 
         # 8️⃣ Возвращаем JSON-ответ
-        return {"message": "✅ Видео успешно изменено!", "url": f"{settings.S3_ENDPOINT}/{settings.S3_BUCKET_NAME}/{unique_id}.{format}"}
+        return {"message": "✅ Видео успешно изменено!", "url": f"{settings.S3_ENDPOINT}/{settings.S3_BUCKET_NAME}/{unique_id}.{format}", "preview": preview}
 
     except HTTPException as e:
         # Если поймали `HTTPException`, просто возвращаем её
@@ -294,7 +524,7 @@ def get_video_resolution(file_path: str):
     except Exception as e:
         raise RuntimeError(f"❌ Ошибка при получении разрешения видео: {str(e)}")
 
-def crop_video(video_id: str, x: int, y: int, width: int, height: int, format: str = "mp4") -> dict:
+def crop_video(video_id: str, x: int, y: int, width: int, height: int, format: str = "mp4", preview: bool = False) -> dict:
     """
     Обрезает видео с помощью FFmpeg и NVENC.
 
@@ -304,6 +534,7 @@ def crop_video(video_id: str, x: int, y: int, width: int, height: int, format: s
     :param width: Ширина обрезанного видео (в пикселях)
     :param height: Высота обрезанного видео (в пикселях)
     :param format: Формат выходного видео (по умолчанию MP4)
+    :param preview: Работать с прокси-версией (быстрое превью)
     :return: JSON-ответ (URL или ошибка)
     """
 
@@ -316,12 +547,13 @@ def crop_video(video_id: str, x: int, y: int, width: int, height: int, format: s
             )
 
         unique_id = uuid.uuid4().hex  # Генерируем уникальный ID
-        input_file = f"/tmp/{video_id}"
+        source_id, proxy_scale = get_preview_source(video_id) if preview else (resolve_video_id(video_id), (1.0, 1.0))  # Для превью берём прокси
+        input_file = f"/tmp/{unique_id}_{os.path.basename(source_id)}"
         output_file = f"/tmp/{unique_id}.{format}"  # Файл с обрезанным видео
 
         # 2️⃣ ПРОВЕРЯЕМ, СУЩЕСТВУЕТ ЛИ ВИДЕО В MinIO
         try:
-            response = s3.head_object(Bucket=settings.S3_BUCKET_NAME, Key=video_id)
+            response = s3.head_object(Bucket=settings.S3_BUCKET_NAME, Key=source_id)
             file_size = response["ContentLength"]
             if file_size == 0:
                 raise HTTPException(status_code=400, detail=f"⚠️ Видео `{video_id}` пустое.")
@@ -331,22 +563,32 @@ def crop_video(video_id: str, x: int, y: int, width: int, height: int, format: s
         # 3️⃣ Скачиваем видео из S3
         try:
             print(f"🚀 Скачивание видео: {video_id}")
-            s3.download_file(settings.S3_BUCKET_NAME, video_id, input_file)
+            s3.download_file(settings.S3_BUCKET_NAME, source_id, input_file)
             print(f"✅ Видео скачано: {input_file}")
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"❌ Ошибка скачивания видео: {str(e)}")
 
-        # 4️⃣ **Получаем оригинальное разрешение видео**
+        # 4️⃣ **Получаем оригинальное разрешение видео** (для превью — прокси, оригинал пересчитываем по масштабу)
         original_width, original_height = get_video_resolution(input_file)
-        print(f"📏 Оригинальный размер видео: {original_width}x{original_height}")
+        scale_x, scale_y = proxy_scale
+        source_width, source_height = round(original_width / scale_x), round(original_height / scale_y)
+        print(f"📏 Оригинальный размер видео: {source_width}x{source_height}")
 
         # 5️⃣ **Проверяем, не выходит ли `crop` за границы**
-        if x + width > original_width or y + height > original_height:
+        if x + width > source_width or y + height > source_height:
             raise HTTPException(
                 status_code=400,
-                detail=f"⛔ Ошибка: Обрезаемая область ({width}x{height} с X={x}, Y={y}) выходит за пределы видео ({original_width}x{original_height})"
+                detail=f"⛔ Ошибка: Обрезаемая область ({width}x{height} с X={x}, Y={y}) выходит за пределы видео ({source_width}x{source_height})"
             )
 
+        # 🔎 Для превью переводим координаты в систему прокси и прижимаем к её границам
+        # (ширина прокси округлена до чётной, поэтому масштаб по осям различается)
+        if preview:
+            x = min(int(x * scale_x), original_width - 1)
+            y = min(int(y * scale_y), original_height - 1)
+            width = max(1, min(round(width * scale_x), original_width - x))
+            height = max(1, min(round(height * scale_y), original_height - y))
+
         # 6️⃣ Обрезаем видео с помощью FFmpeg
         crop_filter = f"crop={width}:{height}:{x}:{y}"
 
@@ -381,7 +623,7 @@ def crop_video(video_id: str, x: int, y: int, width: int, height: int, format: s
         os.remove(output_file)
 
         # 9️⃣ Возвращаем JSON-ответ
-        return {"message": "✅ Видео успешно обрезано!", "url": f"{settings.S3_ENDPOINT}/{settings.S3_BUCKET_NAME}/{unique_id}.{format}"}
+        return {"message": "✅ Видео успешно обрезано!", "url": f"{settings.S3_ENDPOINT}/{settings.S3_BUCKET_NAME}/{unique_id}.{format}", "preview": preview}
 
     except HTTPException as e:
         raise e
@@ -413,13 +655,14 @@ def calculate_size(video_path, target_width, target_height):
     return new_width, new_height, crop_x, crop_y
 
 
-def merge_videos(main_video_id: str, background_video_id: str, format: str = "mp4") -> dict:
+def merge_videos(main_video_id: str, background_video_id: str, format: str = "mp4", preview: bool = False) -> dict:
     """
     Объединяет основное видео и фон в TikTok-формате (9:16).
 
     :param main_video_id: Имя основного видео в S3
     :param background_video_id: Имя фонового видео в S3
     :param format: Формат выходного видео (по умолчанию MP4)
+    :param preview: Работать с прокси-версией (быстрое превью)
     :return: JSON-ответ (URL или ошибка)
     """
 
@@ -427,8 +670,16 @@ def merge_videos(main_video_id: str, background_video_id: str, format: str = "mp
         unique_id = uuid.uuid4().hex  # Генерируем уникальный ID
         output_file = f"/tmp/{unique_id}.{format}"  # Финальный файл
 
-        main_video_path = f"/tmp/{main_video_id}"
-        background_video_path = f"/tmp/{background_video_id}"
+        # 🔎 Для превью берём прокси обоих видео
+        if preview:
+            main_video_id, _ = get_preview_source(main_video_id)
+            background_video_id, _ = get_preview_source(background_video_id)
+        else:
+            main_video_id = resolve_video_id(main_video_id)
+            background_video_id = resolve_video_id(background_video_id)
+
+        main_video_path = f"/tmp/{unique_id}_main_{os.path.basename(main_video_id)}"
+        background_video_path = f"/tmp/{unique_id}_bg_{os.path.basename(background_video_id)}"
 
         # 1️⃣ Скачиваем видео из S3
         try:
@@ -444,7 +695,7 @@ def merge_videos(main_video_id: str, background_video_id: str, format: str = "mp
             raise HTTPException(status_code=500, detail=f"❌ Ошибка скачивания видео: {str(e)}")
 
         # 2️⃣ **Определяем TikTok-формат (1080x1920)**
-        tiktok_width, tiktok_height = 1080, 1920
+        tiktok_width, tiktok_height = (540, 960) if preview else (1080, 1920)
         main_region_height = int(tiktok_height * 0.5)  # Верхняя часть
         bg_region_height = tiktok_height - main_region_height  # Нижняя часть
 
@@ -500,10 +751,28 @@ def merge_videos(main_video_id: str, background_video_id: str, format: str = "mp
         os.remove(output_file)
 
         # 8️⃣ **Возвращаем ссылку**
-        return {"message": "✅ Видео успешно объединено!", "url": f"{settings.S3_ENDPOINT}/{settings.S3_BUCKET_NAME}/{unique_id}.{format}"}
+        return {"message": "✅ Видео успешно объединено!", "url": f"{settings.S3_ENDPOINT}/{settings.S3_BUCKET_NAME}/{unique_id}.{format}", "preview": preview}
 
     except HTTPException as e:
         raise e
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"❌ Внутренняя ошибка сервера: {str(e)}")
+
+
+def generate_proxy_job(video_id: str) -> None:
+    """
+    Генерация прокси как задача очереди: ошибка не глотается, воркер её запишет и повторит.
+    """
+    generate_proxy(video_id, raise_errors=True)
+
+
+# 📌 Операции, которые можно выполнять через очередь задач
+OPERATIONS = {
+    "cut": cut_video,
+    "convert": convert_video,
+    "resize": resize_video,
+    "crop": crop_video,
+    "merge": merge_videos,
+    "proxy": generate_proxy_job,
+}
@@ -1,11 +1,12 @@
 from fastapi import FastAPI
-from app.api.endpoints import videos, editor
+from app.api.endpoints import videos, editor, queue
 
 app = FastAPI(title="FFmpeg Backend")
 
 # Подключаем эндпоинты
 app.include_router(videos.router, prefix="/videos")
 app.include_router(editor.router, prefix="/editor")
+app.include_router(queue.router, prefix="/queue")
 
 # Корневой эндпоинт
 @app.get("/")
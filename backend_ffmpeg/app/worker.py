@@ -0,0 +1,84 @@
+import os
+import socket
+import threading
+import time
+from fastapi import HTTPException
+from app.core.config import settings
+from app.core.services.jobs import claim_job, heartbeat, complete_job, LeaseLost
+from app.core.services.video_editor import OPERATIONS
+
+# Запуск: python -m app.worker
+# Воркеры на разных узлах забирают задачи из общего бакета; API только ставит их в очередь.
+
+
+def run_job(job: dict, etag: str) -> None:
+    """
+    Выполняет задачу, продлевая аренду в фоне, пока идёт обработка.
+    """
+    state = {"etag": etag, "lost": False}
+    done = threading.Event()
+
+    def keep_alive():
+        # Продлеваем аренду с запасом — трижды за срок аренды
+        while not done.wait(settings.JOB_LEASE_SECONDS / 3):
+            try:
+                state["etag"] = heartbeat(job, state["etag"])
+            except LeaseLost:
+                state["lost"] = True
+                print(f"⚠️ Аренда задачи {job['id']} потеряна")
+                return
+            except Exception as e:
+                print(f"⚠️ Ошибка продления аренды {job['id']}: {str(e)}")
+
+    heartbeat_thread = threading.Thread(target=keep_alive, daemon=True)
+    heartbeat_thread.start()
+
+    result, error, retry, wait = None, None, True, False
+    try:
+        print(f"🚀 Задача {job['id']}: {job['operation']} {job['params']}")
+        result = OPERATIONS[job["operation"]](**job["params"])
+    except HTTPException as e:
+        error, retry = str(e.detail), e.status_code >= 500  # Ошибки клиента не повторяем
+        wait = e.status_code == 409  # Зависимость (например, прокси) ещё не готова — ждём
+    except TypeError as e:
+        error, retry = str(e), False  # Неверные параметры — повтор не поможет
+    except Exception as e:
+        error = str(e)
+    finally:
+        done.set()
+        heartbeat_thread.join()
+
+    if state["lost"]:
+        return  # Задачу уже забрал другой воркер — результат не записываем
+
+    try:
+        complete_job(job, state["etag"], result=result, error=error, retry=retry, wait=wait)
+        print(f"✅ Задача {job['id']}: {job['status']}")
+    except LeaseLost:
+        print(f"⚠️ Аренда задачи {job['id']} потеряна до завершения")
+
+
+def main() -> None:
+    worker_id = f"{socket.gethostname()}-{os.getpid()}"
+    print(f"🔥 Воркер {worker_id} запущен")
+
+    while True:
+        try:
+            claimed = claim_job(worker_id)
+        except Exception as e:
+            print(f"❌ Ошибка получения задачи: {str(e)}")
+            claimed = None
+
+        if claimed is None:
+            time.sleep(settings.WORKER_POLL_SECONDS)
+            continue
+
+        try:
+            run_job(*claimed)
+        except Exception as e:
+            # Сбой S3 при записи результата не должен останавливать воркер — аренда истечёт, задачу заберут снова
+            print(f"❌ Ошибка выполнения задачи: {str(e)}")
+
+
+if __name__ == "__main__":
+    main()